@@ -0,0 +1,100 @@
+"""Microbenchmark of the note serialization path.
+
+Loads the same notes two ways, as ORM objects or as column-projected rows
+(note_detail_columns), and encodes them with each available JSON provider.
+Notes carry full content and, optionally, a legacy inline base64 image so
+the encoder sees payloads like the ones still stored in older databases.
+
+    python bench/json_serialization.py --notes 200 --content 4000 --image 50000
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(fn, repeat, number):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=200)
+    parser.add_argument('--content', type=int, default=4000, help='Characters of content per note')
+    parser.add_argument('--image', type=int, default=0, help='Bytes of inline image per note (0 for none)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Read at import time
+        os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                          UPLOAD_FOLDER=os.path.join(tmp, 'uploads'), NOTES_CACHE='none', EMAIL_BACKEND='local')
+        run(args)
+
+
+def run(args):
+    sys.path.insert(0, ROOT)
+    import app as notes_app
+
+    app, db, Note = notes_app.app, notes_app.db, notes_app.Note
+    image = 'data:image/png;base64,' + base64.b64encode(os.urandom(args.image)).decode() if args.image else None
+
+    with app.app_context():
+        user = notes_app.User(email='bench@example.com', password_hash='x', is_verified=True)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(Note(title=f'Note {n}', content='lorem ipsum "quoted" ' * (args.content // 20),
+                                image_data=image, user_id=user.id) for n in range(args.notes))
+        db.session.commit()
+
+        def load_orm():
+            # The original path: full ORM objects, one dict built per note
+            # content and image_data are deferred; load them now, they cannot be after expunge
+            notes = Note.query.options(db.undefer(Note.content), db.undefer(Note.image_data)) \
+                .filter_by(user_id=user.id).all()
+            db.session.expunge_all()
+            return [{
+                'id': note.id,
+                'title': note.title,
+                'content': note.content,
+                'color': note.color,
+                'image_url': notes_app.note_image_url(note),
+                'thumbnail_urls': notes_app.thumbnail_urls(note.image_hash),
+                'is_pinned': note.is_pinned,
+                'created_at': note.created_at.isoformat()
+            } for note in notes]
+
+        def load_rows():
+            rows = db.session.query(*notes_app.note_detail_columns()).filter(Note.user_id == user.id).all()
+            return [notes_app.serialize_note(row) for row in rows]
+
+        providers = {'stdlib': notes_app.JSONProvider(app)}
+        if notes_app.orjson is not None:
+            providers['orjson'] = notes_app.OrjsonJSONProvider(app)
+
+        size = len(providers['stdlib'].dumpb({'notes': load_rows()}))
+        print(f'{args.notes} notes, {size / 1024:.0f} KiB of JSON per response\n')
+        print(f"{'path':<16}{'load ms':>10}{'encode ms':>11}{'total ms':>10}{'MB/s':>9}")
+        for load_name, load in (('orm', load_orm), ('rows', load_rows)):
+            load_time = best_of(load, args.repeat, args.number)
+            payload = {'notes': load()}
+            for name, provider in providers.items():
+                encode_time = best_of(lambda: provider.dumpb(payload), args.repeat, args.number)
+                total = load_time + encode_time
+                print(f"{load_name + ' + ' + name:<16}{load_time * 1000:>10.2f}{encode_time * 1000:>11.2f}"
+                      f"{total * 1000:>10.2f}{size / total / 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+"""Load test for the notes API.
+
+Seeds a fresh database (and image store) with users, notes and images, then
+drives a request mix from worker threads, either in-process through Flask's
+test client or over HTTP against a local gunicorn started with
+gunicorn.conf.py. Reports throughput and p50/p95/p99 latency per operation,
+writes the results as JSON and can compare them with a saved baseline.
+
+    python bench/load.py --mix dashboard --output baseline.json
+    # ...change something...
+    python bench/load.py --mix dashboard --baseline baseline.json --fail-over 10
+    python bench/load.py --target gunicorn --workers 4 --threads 32
+    python bench/load.py --backend postgresql --mix writes
+
+--backend postgresql runs initdb and pg_ctl from PATH to start a throwaway
+server in the temporary directory, so both backends are measured on the
+same seeded data.
+
+Exit status is 1 when --fail-over is given and p95 latency rose, or
+throughput fell, by more than that many percent against the baseline.
+"""
+import argparse
+import base64
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from PIL import Image
+except ImportError:  # Images are then signature plus noise, and get no thumbnails
+    Image = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'bench-password'
+
+# Relative weights per operation
+MIXES = {
+    'dashboard': {'list': 55, 'get': 15, 'create': 8, 'update': 8, 'pin': 6, 'delete': 3, 'login': 5},
+    'writes': {'list': 20, 'create': 30, 'update': 25, 'pin': 15, 'delete': 10},
+    'reads': {'list': 70, 'get': 30},
+    'logins': {'login': 50, 'list': 50},
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(latencies, errors, wall):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': len(latencies) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def fake_png(size, rng):
+    """A PNG of roughly `size` bytes; noise does not compress."""
+    if Image is None:
+        return b'\x89PNG\r\n\x1a\n' + rng.randbytes(max(0, size - 8))
+    side = max(1, int(size ** 0.5))
+    out = io.BytesIO()
+    Image.frombytes('L', (side, side), rng.randbytes(side * side)).save(out, 'PNG')
+    return out.getvalue()
+
+
+def seed(notes_app, args, rng):
+    """Create users with notes and images; return their emails."""
+    app, db = notes_app.app, notes_app.db
+    with app.app_context():
+        password_hash = notes_app.generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+        emails = [f'bench{i}@example.com' for i in range(args.users)]
+        db.session.execute(db.insert(notes_app.User), [
+            {'email': email, 'password_hash': password_hash, 'is_verified': True} for email in emails
+        ])
+        user_ids = db.session.scalars(db.select(notes_app.User.id).order_by(notes_app.User.id)).all()
+        images = []
+        if args.image_bytes:
+            for _ in range(args.images):
+                raw = fake_png(args.image_bytes, rng)
+                image_hash = notes_app.hashlib.sha256(raw).hexdigest()
+                notes_app.write_file_atomic(notes_app.image_path(image_hash), lambda f: f.write(raw))
+                notes_app.generate_thumbnails(image_hash)
+                images.append(image_hash)
+        for user_id in user_ids:
+            db.session.execute(db.insert(notes_app.Note), [{
+                'title': f'Note {n}',
+                'content': 'lorem ipsum ' * (args.content_bytes // 12),
+                'image_hash': rng.choice(images) if images and rng.random() < args.image_ratio else None,
+                'is_pinned': rng.random() < 0.05,
+                'user_id': user_id,
+            } for n in range(args.notes)])
+        db.session.commit()
+    return emails
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HTTPClient:
+    """One keep-alive connection per worker thread."""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # Dropped keep-alive connection (e.g. a worker recycled): reconnect once
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+def run_load(make_client, emails, args, mix=None):
+    """Drive args.threads threads through `mix` and return summaries per op.
+
+    `mix` is {op: weight} for every thread (default MIXES[args.mix]), or a
+    list with one such dict per thread.
+    """
+    mixes = mix if isinstance(mix, list) else [mix or MIXES[args.mix]] * args.threads
+    ops = list(dict.fromkeys(op for thread_mix in mixes for op in thread_mix))
+    latencies = {op: [] for op in ops}
+    errors = {op: 0 for op in ops}
+    lock = threading.Lock()
+    image = None
+    if args.image_bytes:
+        image = 'data:image/png;base64,' + base64.b64encode(fake_png(args.image_bytes, random.Random(0))).decode()
+    state = {}
+    # Start the clock once every worker has logged in and loaded its notes
+    ready = threading.Barrier(args.threads + 1, action=lambda: state.update(
+        deadline=time.perf_counter() + args.warmup + args.seconds))
+
+    def worker(index):
+        rng = random.Random(args.seed + index)
+        thread_ops, weights = zip(*mixes[index].items())
+        client = make_client()
+        email = emails[index % len(emails)]
+        _, data = client.request('POST', '/api/login', {'email': email, 'password': PASSWORD})
+        headers = {'Authorization': 'Bearer ' + data['token']}
+        _, data = client.request('GET', '/api/notes', headers=headers)
+        note_ids = [note['id'] for note in data['notes']]
+        ready.wait()
+        while time.perf_counter() < state['deadline']:
+            op = rng.choices(thread_ops, weights)[0]
+            if op in ('get', 'update', 'pin', 'delete') and not note_ids:
+                op = 'create'
+            start = time.perf_counter()
+            if op == 'list':
+                status, _ = client.request('GET', '/api/notes', headers=headers)
+            elif op == 'get':
+                status, _ = client.request('GET', f'/api/notes/{rng.choice(note_ids)}', headers=headers)
+            elif op == 'create':
+                body = {'title': 'bench', 'content': 'x' * args.content_bytes}
+                if image and rng.random() < args.image_ratio:
+                    body['image_data'] = image
+                status, data = client.request('POST', '/api/notes', body, headers)
+                if status == 201:
+                    note_ids.append(data['note_id'])
+            elif op == 'update':
+                status, _ = client.request('PUT', f'/api/notes/{rng.choice(note_ids)}',
+                                           {'title': 'edited', 'content': 'y' * args.content_bytes}, headers)
+            elif op == 'pin':
+                status, _ = client.request('PUT', f'/api/notes/{rng.choice(note_ids)}/pin', headers=headers)
+            elif op == 'delete':
+                note_id = note_ids.pop(rng.randrange(len(note_ids)))
+                status, _ = client.request('DELETE', f'/api/notes/{note_id}', headers=headers)
+            else:
+                status, _ = client.request('POST', '/api/login', {'email': email, 'password': PASSWORD})
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status >= 500:
+                    errors[op] += 1
+                else:
+                    latencies[op].append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    if args.warmup:
+        time.sleep(args.warmup)
+        with lock:
+            for op in ops:
+                latencies[op].clear()
+                errors[op] = 0
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    everything = [v for values in latencies.values() for v in values]
+    return {
+        'summary': summarize(everything, sum(errors.values()), wall),
+        'ops': {op: summarize(latencies[op], errors[op], wall) for op in ops},
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_postgres(tmp):
+    data = os.path.join(tmp, 'pgdata')
+    try:
+        initdb = subprocess.run(['initdb', '-D', data, '-U', 'postgres', '--auth=trust'],
+                                capture_output=True, text=True)
+    except FileNotFoundError:
+        raise SystemExit('--backend postgresql needs initdb and pg_ctl on PATH')
+    if initdb.returncode:
+        # initdb refuses to run as root, among other things
+        raise SystemExit(f'initdb failed: {initdb.stderr.strip()}')
+    # Unix socket only, in the temporary directory: nothing else can connect
+    subprocess.run(['pg_ctl', '-D', data, '-w', '-l', os.path.join(tmp, 'postgres.log'),
+                    '-o', f"-k {tmp} -c listen_addresses=''", 'start'],
+                   check=True, stdout=subprocess.DEVNULL)
+    return data, f'postgresql://postgres@/postgres?host={tmp}'
+
+
+def stop_postgres(data):
+    subprocess.run(['pg_ctl', '-D', data, '-m', 'fast', 'stop'], stdout=subprocess.DEVNULL)
+
+
+def start_gunicorn(env, args):
+    port = free_port()
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(args.workers))
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit('gunicorn exited during startup')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return server, port
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('gunicorn did not start within 60s')
+
+
+def compare(results, baseline, fail_over):
+    """Print changes against the baseline; return True if a regression exceeds fail_over."""
+    print(f"\nagainst baseline ({baseline['config']['target']}, {baseline['config']['mix']}):")
+    print(f"{'op':<10}{'req/s':>16}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}")
+    regressed = False
+    rows = [('all', results['summary'], baseline['summary'])]
+    rows += [(op, r, baseline['ops'][op]) for op, r in results['ops'].items() if op in baseline['ops']]
+
+    def change(new, old):
+        return (new - old) / old * 100 if old else 0.0
+
+    for op, new, old in rows:
+        cells = [f"{new['throughput_rps']:>8.1f} {change(new['throughput_rps'], old['throughput_rps']):>+6.1f}%"]
+        cells += [f"{new[key]:>10.2f} {change(new[key], old[key]):>+6.1f}%" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        print(f'{op:<10}' + ''.join(cells))
+    if fail_over is not None:
+        new, old = results['summary'], baseline['summary']
+        regressed = (change(new['p95_ms'], old['p95_ms']) > fail_over
+                     or -change(new['throughput_rps'], old['throughput_rps']) > fail_over)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='dashboard')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2, help='Seconds run before measuring')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--notes', type=int, default=500, help='Notes seeded per user')
+    parser.add_argument('--content-bytes', type=int, default=600)
+    parser.add_argument('--images', type=int, default=20, help='Distinct images seeded')
+    parser.add_argument('--image-bytes', type=int, default=0, help='Image size; 0 seeds no images')
+    parser.add_argument('--image-ratio', type=float, default=0.2, help='Share of notes with an image')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--backend', choices=['sqlite', 'postgresql'], default='sqlite')
+    parser.add_argument('--database', help='SQLite file to seed (default: a temporary one)')
+    parser.add_argument('--output', help='Write results as JSON here')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--fail-over', type=float, help='Exit 1 on a regression above this many percent')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pgdata = None
+        if args.backend == 'postgresql':
+            pgdata, database_url = start_postgres(tmp)
+        else:
+            database = os.path.abspath(args.database or os.path.join(tmp, 'bench.db'))
+            if os.path.exists(database):
+                raise SystemExit(f'{database} exists; the benchmark only seeds a new database')
+            database_url = f'sqlite:///{database}'
+        try:
+            # Read by the app at import time, here and in gunicorn
+            env = dict(os.environ, DATABASE_URL=database_url, UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+                       EMAIL_BACKEND='local')
+            os.environ.update(env)
+            sys.path.insert(0, ROOT)
+            import app as notes_app
+
+            emails = seed(notes_app, args, random.Random(args.seed))
+            # Release the seeding connections before another process opens the database
+            with notes_app.app.app_context():
+                notes_app.db.engine.dispose()
+
+            if args.target == 'gunicorn':
+                server, port = start_gunicorn(env, args)
+                try:
+                    results = run_load(lambda: HTTPClient(port), emails, args)
+                finally:
+                    server.terminate()
+                    server.wait()
+            else:
+                results = run_load(lambda: InProcessClient(notes_app.app), emails, args)
+            with notes_app.app.app_context():
+                notes_app.db.engine.dispose()
+        finally:
+            if pgdata:
+                stop_postgres(pgdata)
+
+    results = {'config': vars(args), 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'), **results}
+    print(f"{args.target} on {args.backend}, mix {args.mix}, {args.threads} threads, {args.seconds:g}s\n")
+    print(f"{'op':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for op, r in [('all', results['summary'])] + list(results['ops'].items()):
+        print(f"{op:<10}{r['requests']:>10}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.2f}"
+              f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(results, json.load(f), args.fail_over):
+                raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Login throughput against note latency, with hashing inline or in a pool.
+
+Each configuration runs in a fresh process on its own temporary database.
+Login threads sign in back to back while note threads read the notes list;
+the report shows logins per second, how many were shed with 503, and the
+note list's latency percentiles while the logins are running. Seeding and
+the request loop are bench/load.py's.
+
+    python bench/password_hashing.py --login-threads 8 --note-threads 8 --seconds 10
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from load import ROOT, InProcessClient, run_load, seed
+
+
+def run_worker(args):
+    # Imported here: PASSWORD_HASH_* and DATABASE_URL are read at import time
+    sys.path.insert(0, ROOT)
+    import app as notes_app
+
+    emails = seed(notes_app, args, random.Random(args.seed))
+    # Each thread signs in before timing starts, so the pool's processes are up by then
+    mixes = [{'login': 1}] * args.login_threads + [{'list': 1}] * args.note_threads
+    results = run_load(lambda: InProcessClient(notes_app.app), emails, args, mixes)
+    logins, notes = results['ops']['login'], results['ops']['list']
+    print(json.dumps({
+        'workers': notes_app.app.config['PASSWORD_HASH_WORKERS'],
+        'logins_per_s': logins['throughput_rps'],
+        'shed': logins['errors'],
+        'notes_per_s': notes['throughput_rps'],
+        'note_p50_ms': notes['p50_ms'],
+        'note_p95_ms': notes['p95_ms'],
+        'note_p99_ms': notes['p99_ms'],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--note-threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=1, help='Seconds run before measuring')
+    parser.add_argument('--workers', nargs='+', default=['0', '2'], help='PASSWORD_HASH_WORKERS values; 0 is inline')
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD, e.g. pbkdf2:sha256:600000')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.set_defaults(users=4, notes=200, content_bytes=480, images=0, image_bytes=0, image_ratio=0)
+    args = parser.parse_args()
+    args.threads = args.login_threads + args.note_threads
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PASSWORD_HASH_WORKERS=workers, EMAIL_BACKEND='local',
+                       DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                       UPLOAD_FOLDER=os.path.join(tmp, 'uploads'))
+            if args.method:
+                env['PASSWORD_HASH_METHOD'] = args.method
+            out = subprocess.run([sys.executable, __file__, '--worker'] + sys.argv[1:],
+                                 env=env, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'workers':<9}{'logins/s':>10}{'shed':>7}{'notes/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        print(f"{r['workers'] or 'inline':<9}{r['logins_per_s']:>10.1f}{r['shed']:>7}{r['notes_per_s']:>10.1f}"
+              f"{r['note_p50_ms']:>9.2f}{r['note_p95_ms']:>9.2f}{r['note_p99_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Concurrent load against the notes API under each SQLite profile.
+
+Every profile runs in a fresh process on its own temporary database. Worker
+threads drive a dashboard-like mix: mostly list reads, with creates, pin
+toggles and edits in between. The report shows throughput, tail latency and
+the number of requests that failed (e.g. "database is locked").
+
+Seeding and the request loop are bench/load.py's.
+
+    python bench/sqlite_profile.py --threads 16 --seconds 10
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from load import ROOT, InProcessClient, run_load, seed
+
+MIX = {'list': 70, 'create': 15, 'pin': 10, 'update': 5}
+WRITES = ('create', 'pin', 'update')
+
+
+def run_worker(args):
+    # Imported here: DATABASE_URL and SQLITE_PROFILE are read at import time
+    sys.path.insert(0, ROOT)
+    import app as notes_app
+
+    emails = seed(notes_app, args, random.Random(args.seed))
+    results = run_load(lambda: InProcessClient(notes_app.app), emails, args, MIX)
+    print(json.dumps({'profile': os.environ['SQLITE_PROFILE'], **results}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=1, help='Seconds run before measuring')
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--notes', type=int, default=200, help='Notes seeded per user')
+    parser.add_argument('--content-bytes', type=int, default=480)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'tuned'])
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.set_defaults(images=0, image_bytes=0, image_ratio=0)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = []
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Hash inline: sign-ins happen before timing and must not be shed
+            env = dict(os.environ, SQLITE_PROFILE=profile, EMAIL_BACKEND='local', PASSWORD_HASH_WORKERS='0',
+                       DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                       UPLOAD_FOLDER=os.path.join(tmp, 'uploads'))
+            out = subprocess.run([sys.executable, __file__, '--worker'] + sys.argv[1:],
+                                 env=env, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'profile':<10}{'op':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        for op, s in [('all', r['summary'])] + [(op, r['ops'][op]) for op in WRITES]:
+            print(f"{r['profile']:<10}{op:<8}{s['throughput_rps']:>10.1f}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}"
+                  f"{s['p99_ms']:>10.2f}{s['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
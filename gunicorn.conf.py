@@ -0,0 +1,53 @@
+"""Gunicorn settings for the notes app.
+
+Every value can be overridden from the environment, e.g.
+WEB_CONCURRENCY=4 GUNICORN_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Processes: the usual (2 x cores) + 1, unless the platform sets WEB_CONCURRENCY
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# gthread: a thread pool per worker, good for this mostly I/O-bound app.
+# gevent: green threads for many idle keep-alive connections (pip install gevent).
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+# Under gthread an open /api/notes/stream holds one of these threads. The app
+# reads GUNICORN_THREADS too and lets at most STREAM_MAX_OPEN of them stream
+# (default threads // 2), so the server holds workers x STREAM_MAX_OPEN live
+# streams. Further browsers get 503 and catch up from /api/notes/changes
+# until a retry finds a slot. Raise GUNICORN_THREADS, or use gevent, to fit
+# more; set it here through the environment, not with --threads.
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Import the app once in the master so workers share its memory and the
+# schema is migrated before any worker starts. gevent has to monkey-patch
+# before the app is imported, so it loads the app in each worker instead.
+preload_app = worker_class not in ('gevent', 'eventlet')
+
+# Keep connections from a reverse proxy open between requests
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers now and then to cap slow memory growth; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+accesslog = '-'
+# The default format, but with the path instead of the full request line:
+# EventSource passes its JWT as ?token=, which must not end up in the logs
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Workers must not reuse database connections opened by the master
+    if preload_app:
+        import app
+        app.reset_after_fork()
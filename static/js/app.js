@@ -0,0 +1,547 @@
+let currentToken = null;
+let pendingEmail = null;
+let selectedColor = '#ffffff';
+let selectedImage = null;
+let editingNoteId = null;
+let editingNoteEtag = null;
+let nextCursor = null;
+let loadingNotes = false;
+let searchQuery = '';
+let searchTimer = null;
+let loadedNotes = new Map();  // Cards of the notes list by id, patched by syncNotes()
+let lastPageNote = null;      // Last card of the most recent page
+let notesVersion = null;      // Server notes version the list reflects
+let noteStream = null;        // EventSource with live changes from other tabs and devices
+let noteStreamRetry = null;   // Timer that reopens a refused stream
+let noteStreamDelay = 3000;   // Milliseconds until then; doubles per refusal
+
+// Fetch the next page once the bottom of the grid scrolls into view
+const notesObserver = new IntersectionObserver(entries => {
+    if (entries[0].isIntersecting && nextCursor && !loadingNotes) {
+        searchQuery ? loadSearchResults(nextCursor) : loadNotes(nextCursor);
+    }
+}, { rootMargin: '400px' });
+notesObserver.observe(document.getElementById('notesSentinel'));
+
+function showTab(tab) {
+    document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
+    document.querySelectorAll('.form').forEach(f => f.classList.remove('active'));
+    event.target.classList.add('active');
+    document.getElementById(tab + 'Form').classList.add('active');
+}
+
+function showMessage(elementId, message, type) {
+    const el = document.getElementById(elementId);
+    el.textContent = message;
+    el.className = 'message ' + type;
+    el.style.display = 'block';
+}
+
+async function register() {
+    const email = document.getElementById('registerEmail').value.trim();
+    const password = document.getElementById('registerPassword').value;
+
+    if (!email || !password) {
+        showMessage('registerMessage', 'Please fill all fields!', 'error');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/register', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ email, password })
+        });
+        const data = await response.json();
+
+        if (response.ok) {
+            showMessage('registerMessage', '✅ OTP sent to your email!', 'success');
+            pendingEmail = email;
+            setTimeout(() => {
+                document.getElementById('authSection').style.display = 'none';
+                document.getElementById('otpSection').classList.add('active');
+            }, 1500);
+        } else {
+            showMessage('registerMessage', '❌ ' + data.message, 'error');
+        }
+    } catch (error) {
+        showMessage('registerMessage', '❌ Network error!', 'error');
+    }
+}
+
+async function verifyOTP() {
+    const otp = document.getElementById('otpInput').value.trim();
+
+    if (otp.length !== 6) {
+        showMessage('otpMessage', 'Please enter 6-digit OTP!', 'error');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/verify-otp', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ email: pendingEmail, otp })
+        });
+        const data = await response.json();
+
+        if (response.ok) {
+            showMessage('otpMessage', '✅ Verified! Please login.', 'success');
+            setTimeout(() => {
+                document.getElementById('otpSection').classList.remove('active');
+                document.getElementById('authSection').style.display = 'block';
+                showTab('login');
+            }, 1500);
+        } else {
+            showMessage('otpMessage', '❌ ' + data.message, 'error');
+        }
+    } catch (error) {
+        showMessage('otpMessage', '❌ Network error!', 'error');
+    }
+}
+
+async function login() {
+    const email = document.getElementById('loginEmail').value.trim();
+    const password = document.getElementById('loginPassword').value;
+
+    if (!email || !password) {
+        showMessage('loginMessage', 'Please fill all fields!', 'error');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/login', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ email, password })
+        });
+        const data = await response.json();
+
+        if (response.ok) {
+            currentToken = data.token;
+            document.getElementById('authPage').style.display = 'none';
+            document.getElementById('dashboard').classList.add('active');
+            document.getElementById('userEmail').textContent = data.user.email;
+            loadNotes();
+            openNoteStream();
+        } else {
+            showMessage('loginMessage', '❌ ' + data.message, 'error');
+        }
+    } catch (error) {
+        showMessage('loginMessage', '❌ Network error!', 'error');
+    }
+}
+
+function selectColor(color) {
+    selectedColor = color;
+    // Change dashboard background
+    const dashboard = document.getElementById('dashboard');
+    if (color === '#000000') {
+        dashboard.style.background = '#1a1a1a';
+    } else if (color === '#ffffff') {
+        dashboard.style.background = '#f5f5f5';
+    } else {
+        dashboard.style.background = color + '40'; // Add transparency
+    }
+}
+
+function previewImage() {
+    const file = document.getElementById('imageInput').files[0];
+    if (file) {
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            selectedImage = e.target.result;
+            document.getElementById('imagePreview').src = e.target.result;
+            document.getElementById('imagePreview').style.display = 'block';
+        };
+        reader.readAsDataURL(file);
+    }
+}
+
+async function createNote() {
+    const title = document.getElementById('noteTitle').value.trim();
+    const content = document.getElementById('noteContent').value.trim();
+
+    if (!title && !content && !selectedImage) {
+        showMessage('noteMessage', 'Please add title, content, or image!', 'error');
+        return;
+    }
+
+    try {
+        const url = editingNoteId ? `/api/notes/${editingNoteId}` : '/api/notes';
+        const method = editingNoteId ? 'PUT' : 'POST';
+        const headers = {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer ' + currentToken
+        };
+        if (editingNoteId && editingNoteEtag) headers['If-Match'] = editingNoteEtag;
+
+        const response = await fetch(url, {
+            method: method,
+            headers: headers,
+            body: JSON.stringify({
+                title: title,
+                content: content,
+                color: selectedColor,
+                image_data: selectedImage
+            })
+        });
+
+        if (response.ok) {
+            document.getElementById('noteTitle').value = '';
+            document.getElementById('noteContent').value = '';
+            document.getElementById('imageInput').value = '';
+            document.getElementById('imagePreview').style.display = 'none';
+            selectedImage = null;
+            selectedColor = '#ffffff';
+            editingNoteId = null;
+            editingNoteEtag = null;
+            document.querySelector('.add-note-btn').textContent = 'Add Note';
+            document.getElementById('dashboard').style.background = '#f5f5f5';
+            syncNotes();
+        } else if (response.status === 412) {
+            showMessage('noteMessage', 'This note was changed elsewhere. Open it again to edit the latest version.', 'error');
+        }
+    } catch (error) {
+        showMessage('noteMessage', '❌ Error saving note!', 'error');
+    }
+}
+
+async function loadNotes(cursor = null) {
+    loadingNotes = true;
+    try {
+        let url = '/api/notes';
+        if (cursor) url += '?cursor=' + encodeURIComponent(cursor);
+
+        const response = await fetch(url, {
+            headers: { 'Authorization': 'Bearer ' + currentToken }
+        });
+        const data = await response.json();
+
+        if (!cursor) {
+            loadedNotes.clear();
+            notesVersion = data.version;
+        }
+        // A note synced into the list since the last page (e.g. just unpinned)
+        // may come again on this one; the synced card is already current
+        const notes = data.notes.filter(note => !loadedNotes.has(note.id));
+        notes.forEach(note => loadedNotes.set(note.id, note));
+        lastPageNote = data.notes.length ? data.notes[data.notes.length - 1] : lastPageNote;
+        nextCursor = data.next_cursor;
+        displayNotes(notes, Boolean(cursor));
+    } catch (error) {
+        document.getElementById('notesGrid').innerHTML = '<p class="no-notes">Error loading notes</p>';
+    } finally {
+        loadingNotes = false;
+    }
+}
+
+// Same order as the server: pinned first, newest first, then by id
+function compareNotes(a, b) {
+    if (a.is_pinned !== b.is_pinned) return a.is_pinned ? -1 : 1;
+    if (a.created_at !== b.created_at) return a.created_at < b.created_at ? 1 : -1;
+    return b.id - a.id;
+}
+
+// Apply only what changed since the list was loaded instead of refetching it
+async function syncNotes() {
+    if (searchQuery) {
+        loadSearchResults();
+        return;
+    }
+    if (notesVersion === null) {
+        loadNotes();
+        return;
+    }
+    try {
+        const response = await fetch('/api/notes/changes?since=' + notesVersion, {
+            headers: { 'Authorization': 'Bearer ' + currentToken }
+        });
+        const data = await response.json();
+        if (data.reset) {
+            loadNotes();
+            return;
+        }
+
+        applyChanges(data.notes, data.deleted, data.version);
+    } catch (error) {
+        loadNotes();
+    }
+}
+
+function applyChanges(notes, deleted, version) {
+    deleted.forEach(id => loadedNotes.delete(id));
+    notes.forEach(note => {
+        // Notes past the loaded pages will arrive with a later page
+        if (!nextCursor || loadedNotes.has(note.id) || compareNotes(note, lastPageNote) < 0) {
+            loadedNotes.set(note.id, note);
+        }
+    });
+    notesVersion = version;
+    displayNotes([...loadedNotes.values()].sort(compareNotes));
+}
+
+// Live changes pushed by the server. EventSource reconnects by itself after
+// network errors and resumes after the last event it saw (Last-Event-ID).
+// An error response (503 when the worker has no stream slot left, 401 on an
+// expired token) ends it for good: then catch up from /changes and try
+// again later, backing off to once a minute.
+function openNoteStream() {
+    closeNoteStream();
+    noteStream = new EventSource('/api/notes/stream?token=' + encodeURIComponent(currentToken));
+    const onChange = event => {
+        const data = JSON.parse(event.data);
+        // Changes already in the list (our own writes, or a newer load) need nothing
+        if (searchQuery || notesVersion === null || data.version < notesVersion) return;
+        if (event.type === 'deleted') {
+            applyChanges([], [data.id], data.version);
+        } else {
+            applyChanges([data.note], [], data.version);
+        }
+    };
+    ['created', 'updated', 'pinned', 'deleted'].forEach(type => noteStream.addEventListener(type, onChange));
+    noteStream.addEventListener('ready', event => {
+        noteStreamDelay = 3000;
+        // Anything between the list load and the stream opening
+        if (notesVersion !== null && JSON.parse(event.data).version > notesVersion) syncNotes();
+    });
+    noteStream.addEventListener('reset', () => {
+        if (!searchQuery) loadNotes();
+    });
+    noteStream.onerror = () => {
+        if (noteStream.readyState !== EventSource.CLOSED) return;
+        closeNoteStream();
+        syncNotes();
+        noteStreamRetry = setTimeout(openNoteStream, noteStreamDelay);
+        noteStreamDelay = Math.min(noteStreamDelay * 2, 60000);
+    };
+}
+
+function closeNoteStream() {
+    clearTimeout(noteStreamRetry);
+    noteStreamRetry = null;
+    if (noteStream) {
+        noteStream.close();
+        noteStream = null;
+    }
+}
+
+function displayNotes(notes, append = false) {
+    const grid = document.getElementById('notesGrid');
+
+    if (!append && notes.length === 0) {
+        grid.innerHTML = '<p class="no-notes">No notes yet. Create your first note! 📝</p>';
+        return;
+    }
+
+    // Pages arrive already ordered pinned-first by the server
+    const html = notes.map(renderNoteCard).join('');
+    if (append) {
+        grid.insertAdjacentHTML('beforeend', html);
+    } else {
+        grid.innerHTML = html;
+    }
+}
+
+function renderNoteCard(note) {
+    const isBlack = note.color === '#000000';
+    const textColor = isBlack ? 'color: white;' : '';
+    return `
+    <div class="note-card ${note.is_pinned ? 'pinned' : ''} ${isBlack ? 'black-note' : ''}"
+         style="background-color: ${note.color}"
+         onclick="editNote(${note.id})">
+        <span class="material-icons pin-icon ${note.is_pinned ? 'pinned' : ''}"
+              onclick="event.stopPropagation(); togglePin(${note.id})"
+              style="${textColor}">
+            ${note.is_pinned ? 'push_pin' : 'push_pin'}
+        </span>
+        ${note.thumbnail_urls ? renderThumbnail(note.thumbnail_urls) : ''}
+        ${note.title ? `<h4 style="${textColor}">${note.title}</h4>` : ''}
+        ${note.content_preview ? `<p style="${textColor}">${note.content_preview}${note.is_truncated ? '…' : ''}</p>` : ''}
+        <div class="note-actions-bar">
+            <button class="note-icon-btn" onclick="event.stopPropagation(); shareNote(${note.id})" title="Share">
+                <span class="material-icons" style="${textColor}">share</span>
+            </button>
+            <button class="note-icon-btn" onclick="event.stopPropagation(); deleteNote(${note.id})" title="Delete">
+                <span class="material-icons" style="color: #dc3545;">delete</span>
+            </button>
+        </div>
+        <div class="note-card-footer">
+            <span class="note-date" style="${textColor}">${new Date(note.created_at).toLocaleDateString()}</span>
+        </div>
+    </div>
+    `;
+}
+
+function renderThumbnail(urls) {
+    // Let the browser pick the smallest thumbnail that fills the card
+    const widths = Object.keys(urls).map(Number).sort((a, b) => a - b);
+    const srcset = widths.map(w => `${urls[w]} ${w}w`).join(', ');
+    return `<img src="${urls[widths[0]]}" srcset="${srcset}" sizes="(max-width: 480px) 100vw, 240px" class="note-image" loading="lazy" decoding="async">`;
+}
+
+function editNote(noteId) {
+    fetch(`/api/notes/${noteId}`, {
+        headers: { 'Authorization': 'Bearer ' + currentToken }
+    })
+    .then(res => {
+        editingNoteEtag = res.headers.get('ETag');
+        return res.json();
+    })
+    .then(data => {
+        const note = data.note;
+        document.getElementById('noteTitle').value = note.title || '';
+        document.getElementById('noteContent').value = note.content || '';
+        selectedColor = note.color;
+        selectedImage = note.image_url;
+
+        if (note.image_url) {
+            document.getElementById('imagePreview').src = note.image_url;
+            document.getElementById('imagePreview').style.display = 'block';
+        }
+
+        editingNoteId = noteId;
+        document.querySelector('.add-note-btn').textContent = 'Update Note';
+
+        // Scroll to top
+        window.scrollTo({ top: 0, behavior: 'smooth' });
+    });
+}
+
+async function shareNote(noteId) {
+    // Cards only carry a preview, so fetch the full note first
+    const response = await fetch(`/api/notes/${noteId}`, {
+        headers: { 'Authorization': 'Bearer ' + currentToken }
+    });
+    const { note } = await response.json();
+    const title = note.title || '';
+    const text = `${title}\n\n${note.content || ''}`;
+    const url = window.location.href;
+
+    if (navigator.share) {
+        // Mobile share
+        navigator.share({
+            title: title || 'My Note',
+            text: text,
+            url: url
+        }).catch(err => console.log('Share failed'));
+    } else {
+        // Desktop - copy to clipboard and show social options
+        const shareText = encodeURIComponent(text);
+        const shareUrl = encodeURIComponent(url);
+
+        const options = `
+            <div style="padding: 20px;">
+                <h3>Share Note</h3>
+                <div style="display: flex; gap: 10px; margin-top: 15px;">
+                    <a href="https://twitter.com/intent/tweet?text=${shareText}" target="_blank"
+                       style="padding: 10px 15px; background: #1DA1F2; color: white; text-decoration: none; border-radius: 5px;">
+                        Twitter
+                    </a>
+                    <a href="https://www.facebook.com/sharer/sharer.php?u=${shareUrl}" target="_blank"
+                       style="padding: 10px 15px; background: #4267B2; color: white; text-decoration: none; border-radius: 5px;">
+                        Facebook
+                    </a>
+                    <a href="https://wa.me/?text=${shareText}" target="_blank"
+                       style="padding: 10px 15px; background: #25D366; color: white; text-decoration: none; border-radius: 5px;">
+                        WhatsApp
+                    </a>
+                    <button onclick="copyToClipboard('${text.replace(/'/g, "\'")}'); this.parentElement.parentElement.parentElement.remove();"
+                            style="padding: 10px 15px; background: #667eea; color: white; border: none; border-radius: 5px; cursor: pointer;">
+                        Copy Text
+                    </button>
+                </div>
+            </div>
+        `;
+
+        const popup = document.createElement('div');
+        popup.style.cssText = 'position: fixed; top: 50%; left: 50%; transform: translate(-50%, -50%); background: white; padding: 20px; border-radius: 10px; box-shadow: 0 4px 20px rgba(0,0,0,0.3); z-index: 1000;';
+        popup.innerHTML = options;
+        document.body.appendChild(popup);
+
+        setTimeout(() => popup.remove(), 30000);
+    }
+}
+
+function copyToClipboard(text) {
+    navigator.clipboard.writeText(text).then(() => {
+        alert('✅ Note copied to clipboard!');
+    });
+}
+
+async function togglePin(noteId) {
+    try {
+        await fetch(`/api/notes/${noteId}/pin`, {
+            method: 'PUT',
+            headers: { 'Authorization': 'Bearer ' + currentToken }
+        });
+        syncNotes();
+    } catch (error) {
+        alert('Error pinning note!');
+    }
+}
+
+async function deleteNote(noteId) {
+    if (!confirm('Delete this note?')) return;
+
+    try {
+        await fetch(`/api/notes/${noteId}`, {
+            method: 'DELETE',
+            headers: { 'Authorization': 'Bearer ' + currentToken }
+        });
+        syncNotes();
+    } catch (error) {
+        alert('Error deleting note!');
+    }
+}
+
+function searchNotes() {
+    // Debounce keystrokes so only the settled query hits the server
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => {
+        searchQuery = document.getElementById('searchInput').value.trim();
+        searchQuery ? loadSearchResults() : loadNotes();
+    }, 250);
+}
+
+async function loadSearchResults(cursor = null) {
+    const query = searchQuery;
+    loadingNotes = true;
+    try {
+        let url = '/api/notes/search?q=' + encodeURIComponent(query);
+        if (cursor) url += '&cursor=' + encodeURIComponent(cursor);
+
+        const response = await fetch(url, {
+            headers: { 'Authorization': 'Bearer ' + currentToken }
+        });
+        const data = await response.json();
+        if (query !== searchQuery) return;  // A newer search superseded this one
+
+        nextCursor = data.next_cursor;
+        // Snippets come back HTML-escaped with <mark> around the matches
+        const notes = data.notes.map(note => ({
+            ...note,
+            title: note.title_highlight,
+            content_preview: note.snippet
+        }));
+        if (!cursor && notes.length === 0) {
+            document.getElementById('notesGrid').innerHTML = '<p class="no-notes">No matching notes</p>';
+            return;
+        }
+        displayNotes(notes, Boolean(cursor));
+    } catch (error) {
+        document.getElementById('notesGrid').innerHTML = '<p class="no-notes">Error searching notes</p>';
+    } finally {
+        loadingNotes = false;
+    }
+}
+
+function logout() {
+    closeNoteStream();
+    noteStreamDelay = 3000;
+    currentToken = null;
+    document.getElementById('dashboard').classList.remove('active');
+    document.getElementById('authPage').style.display = 'flex';
+    document.getElementById('loginEmail').value = '';
+    document.getElementById('loginPassword').value = '';
+}
@@ -0,0 +1,260 @@
+"""API behaviour, above all what differs between SQLite and PostgreSQL.
+
+Every test runs once per backend. PostgreSQL is a throwaway server started
+with bench/load.py's start_postgres (initdb and pg_ctl on PATH, non-root);
+without one those runs are skipped.
+
+    python -m pytest tests
+"""
+import base64
+import email
+import importlib
+import itertools
+import os
+import random
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+from load import fake_png, start_postgres, stop_postgres  # noqa: E402
+
+PASSWORD = 'test-password'
+user_numbers = itertools.count()
+
+
+@pytest.fixture(scope='module', params=['sqlite', 'postgresql'])
+def notes_app(request, tmp_path_factory):
+    tmp = str(tmp_path_factory.mktemp(request.param))
+    pgdata = None
+    if request.param == 'postgresql':
+        try:
+            pgdata, database_url = start_postgres(tmp)
+        except SystemExit as e:
+            pytest.skip(str(e))
+    else:
+        database_url = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+    env = {'DATABASE_URL': database_url, 'UPLOAD_FOLDER': os.path.join(tmp, 'uploads'),
+           'EMAIL_BACKEND': 'local', 'NOTES_CACHE': 'none', 'PASSWORD_HASH_WORKERS': '0'}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    # The app reads its configuration at import, so each backend gets its own import
+    sys.modules.pop('app', None)
+    try:
+        module = importlib.import_module('app')
+        yield module
+        with module.app.app_context():
+            module.db.engine.dispose()
+    finally:
+        sys.modules.pop('app', None)
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        if pgdata:
+            stop_postgres(pgdata)
+
+
+@pytest.fixture
+def client(notes_app):
+    """A test client logged in as a new user, with its auth headers."""
+    return login_new_user(notes_app)
+
+
+def login_new_user(notes_app):
+    from werkzeug.security import generate_password_hash
+
+    email = f'user{next(user_numbers)}@example.com'
+    with notes_app.app.app_context():
+        notes_app.db.session.add(notes_app.User(email=email, password_hash=generate_password_hash(PASSWORD),
+                                                is_verified=True))
+        notes_app.db.session.commit()
+    client = notes_app.app.test_client()
+    token = client.post('/api/login', json={'email': email, 'password': PASSWORD}).json['token']
+    return client, {'Authorization': f'Bearer {token}'}
+
+
+def create_note(client, headers, **fields):
+    response = client.post('/api/notes', json=fields, headers=headers)
+    assert response.status_code == 201
+    return response.json['note_id']
+
+
+def test_migrations_applied_and_idempotent(notes_app):
+    versions = sorted(version for version, _, _ in notes_app.MIGRATIONS)
+    with notes_app.app.app_context():
+        db = notes_app.db
+        assert [row.version for row in notes_app.SchemaVersion.query.order_by('version')] == versions
+        assert notes_app.run_migrations() == []
+
+        # Every migration must cope with a schema that already has its changes
+        notes_app.SchemaVersion.query.delete()
+        db.session.commit()
+        assert [version for version, _ in notes_app.run_migrations()] == versions
+
+        with db.engine.connect() as conn:
+            columns = set(notes_app.column_names(conn, 'note'))
+        assert {'image_hash', 'updated_at', 'version', 'last_change'} <= columns
+        assert ('search_vector' in columns) == (notes_app.DB_BACKEND == 'postgresql')
+
+
+def test_search_prefix_ranking_and_highlights(client):
+    client, headers = client
+    in_title = create_note(client, headers, title='Grocery list', content='apples and bananas')
+    in_content = create_note(client, headers, title='Weekend', content='stop by the grocery store')
+    create_note(client, headers, title='Unrelated', content='nothing to see')
+
+    response = client.get('/api/notes/search', query_string={'q': 'groc'}, headers=headers)
+    assert response.status_code == 200
+    notes = response.json['notes']
+    # Title matches outrank content matches
+    assert [note['id'] for note in notes] == [in_title, in_content]
+    assert notes[0]['title_highlight'] == '<mark>Grocery</mark> list'
+    assert '<mark>grocery</mark>' in notes[1]['snippet']
+
+    response = client.get('/api/notes/search', query_string={'q': 'banan', 'limit': 1}, headers=headers)
+    assert [note['id'] for note in response.json['notes']] == [in_title]
+    assert response.json['next_cursor'] is None
+
+    # Query syntax from the user is matched as text, never parsed
+    response = client.get('/api/notes/search', query_string={'q': "o'reilly & | ! :* \""}, headers=headers)
+    assert response.status_code == 200
+    assert response.json['notes'] == []
+
+
+def test_keyset_pagination(client):
+    client, headers = client
+    ids = [create_note(client, headers, title=f'Note {n}') for n in range(7)]
+    assert client.put(f'/api/notes/{ids[2]}/pin', headers=headers).json['is_pinned'] is True
+
+    seen = []
+    cursor = None
+    while True:
+        query = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+        page = client.get('/api/notes', query_string=query, headers=headers).json
+        assert len(page['notes']) <= 3
+        seen += [note['id'] for note in page['notes']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    # Pinned first, then newest first, each note exactly once
+    assert seen == [ids[2]] + [note_id for note_id in reversed(ids) if note_id != ids[2]]
+    assert client.get('/api/notes', query_string={'cursor': 'garbage'}, headers=headers).status_code == 400
+
+
+def test_returning_writes(client):
+    client, headers = client
+    response = client.post('/api/notes/batch', headers=headers, json={'operations': [
+        {'op': 'create', 'title': 'First'},
+        {'op': 'create', 'title': 'Second'},
+        {'op': 'create', 'title': 'Third'},
+    ]})
+    assert response.status_code == 200
+    created = [result['id'] for result in response.json['results']]
+    # INSERT ... RETURNING hands the ids back in the order of the operations
+    titles = [client.get(f'/api/notes/{note_id}', headers=headers).json['note']['title'] for note_id in created]
+    assert titles == ['First', 'Second', 'Third']
+
+    # Pin and delete are single UPDATE/DELETE ... RETURNING statements
+    assert client.put(f'/api/notes/{created[0]}/pin', headers=headers).json['is_pinned'] is True
+    assert client.put(f'/api/notes/{created[0]}/pin', headers=headers).json['is_pinned'] is False
+    assert client.put('/api/notes/999999/pin', headers=headers).status_code == 404
+    version = client.get('/api/notes', headers=headers).json['version']
+    assert client.delete(f'/api/notes/{created[1]}', headers=headers).status_code == 200
+    assert client.delete(f'/api/notes/{created[1]}', headers=headers).status_code == 404
+
+    changes = client.get('/api/notes/changes', query_string={'since': version}, headers=headers).json
+    assert changes['deleted'] == [created[1]]
+    assert changes['version'] == version + 1
+
+
+def test_reused_id_keeps_other_users_tombstone(notes_app, client):
+    client, headers = client
+    note_id = create_note(client, headers, title='Mine')
+    version = client.get('/api/notes', headers=headers).json['version']
+    assert client.delete(f'/api/notes/{note_id}', headers=headers).status_code == 200
+
+    # SQLite hands the freed highest id to the next insert, whoever makes it
+    other_client, other_headers = login_new_user(notes_app)
+    other_id = create_note(other_client, other_headers, title='Theirs')
+    assert (other_id == note_id) == (notes_app.DB_BACKEND == 'sqlite')
+
+    changes = client.get('/api/notes/changes', query_string={'since': version}, headers=headers).json
+    assert changes['deleted'] == [note_id]
+    assert [note['id'] for note in other_client.get('/api/notes', headers=other_headers).json['notes']] == [other_id]
+
+    # Deleting the reused id leaves a tombstone for each user
+    assert other_client.delete(f'/api/notes/{other_id}', headers=other_headers).status_code == 200
+    changes = client.get('/api/notes/changes', query_string={'since': version}, headers=headers).json
+    assert changes['deleted'] == [note_id]
+
+
+def png_data_url(seed):
+    return 'data:image/png;base64,' + base64.b64encode(fake_png(200, random.Random(seed))).decode()
+
+
+def stored_images(notes_app):
+    """Hashes of the image files in the upload folder, thumbnails aside."""
+    folder = notes_app.app.config['UPLOAD_FOLDER']
+    return {name for _, _, names in os.walk(folder) for name in names if len(name) == 64}
+
+
+def test_batch_releases_superseded_images(notes_app, client):
+    client, headers = client
+    note_id = create_note(client, headers, title='Pictured', image_data=png_data_url(1))
+    image_hash = client.get(f'/api/notes/{note_id}', headers=headers).json['note']['image_url'].rsplit('/', 1)[1]
+    before = stored_images(notes_app)
+    assert image_hash in before
+    operations = [
+        {'op': 'update', 'id': note_id, 'image_data': png_data_url(2)},
+        {'op': 'update', 'id': note_id, 'image_data': png_data_url(3)},
+        {'op': 'delete', 'id': note_id},
+    ]
+
+    # Rejected: none of the images the batch stored are kept
+    response = client.post('/api/notes/batch', headers=headers,
+                           json={'atomic': True, 'operations': operations + [{'op': 'bogus'}]})
+    assert response.status_code == 409
+    assert stored_images(notes_app) == before
+
+    # Applied: the intermediate images go, and so does the deleted note's
+    response = client.post('/api/notes/batch', headers=headers, json={'operations': operations})
+    assert response.status_code == 200
+    assert stored_images(notes_app) == before - {image_hash}
+
+
+def test_hot_queries_use_indexes(notes_app):
+    # The statements `flask explain-queries` checks
+    with notes_app.app.app_context():
+        plans = {name: plan for name, plan, _ in notes_app.explain_hot_queries()}
+        notes_app.db.session.rollback()
+    assert len(plans) == 6
+    for name, plan in plans.items():
+        if notes_app.DB_BACKEND == 'postgresql':
+            assert not any('Seq Scan on note' in step or step.lstrip(' ->').startswith('Sort ') for step in plan), name
+        else:
+            assert 'SCAN note' not in plan, name
+            assert not any('USE TEMP B-TREE' in step for step in plan), name
+
+
+def test_register_delivers_otp_email(notes_app):
+    client = notes_app.app.test_client()
+    address = f'new{next(user_numbers)}@example.com'
+    response = client.post('/api/register', json={'email': address, 'password': PASSWORD})
+    assert response.status_code == 202
+
+    # The request only queued the message; the email workers deliver it
+    notes_app.email_queue.join()
+    messages = [email.message_from_string(message) for _, to_addr, message in notes_app.LocalSMTP.outbox
+                if to_addr == address]
+    assert len(messages) == 1
+    otp = re.search(r'>(\d{6})<', messages[0].get_payload(decode=True).decode()).group(1)
+
+    assert client.post('/api/verify-otp', json={'email': address, 'otp': otp}).status_code == 200
+    assert client.post('/api/login', json={'email': address, 'password': PASSWORD}).status_code == 200